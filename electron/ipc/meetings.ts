@@ -32,7 +32,7 @@ type MeetingsOptions = {
   password?: string | null
 }
 
-const REQUIRED_PACKAGES = ['selenium', 'requests', 'pytz']
+const REQUIRED_PACKAGES = ['selenium', 'requests', 'ciso8601', 'tzdata', 'orjson']
 
 function redactSensitiveText(input: string): string {
   let value = input
@@ -235,9 +235,7 @@ export function registerMeetingsIpc() {
     const pythonBin = resolvePythonBin()
     const venvPython = ensurePythonEnv(pythonBin)
     const args = [scriptPath, '--browser', browser]
-    if (headless) {
-      args.push('--headless')
-    }
+    args.push(headless ? '--headless' : '--show-browser')
     if (month) {
       args.push('--month', month)
     }
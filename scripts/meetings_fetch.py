@@ -1,13 +1,20 @@
 import argparse
 import json
 import os
+import re
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Iterable, Iterator
+from zoneinfo import ZoneInfo
 
 import csv
-import pytz
 import requests
+from requests.adapters import HTTPAdapter
+from ciso8601 import parse_datetime
 from selenium import webdriver
 from selenium.common.exceptions import (
     NoSuchElementException,
@@ -20,9 +27,24 @@ from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 import subprocess
+from urllib.parse import quote, urlencode
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
 GRAPH_EXPLORER_URL = "https://developer.microsoft.com/en-us/graph/graph-explorer"
+GRAPH_API_ROOT = "https://graph.microsoft.com/v1.0"
+GRAPH_BATCH_URL = f"{GRAPH_API_ROOT}/$batch"
+GRAPH_BATCH_LIMIT = 20
+GRAPH_BATCH_CONCURRENCY = 4
+GRAPH_BATCH_MAX_RETRIES = 3
+GRAPH_BATCH_RETRY_SECONDS = 2.0
+MONTH_FETCH_CONCURRENCY = 8
+EVENTS_PAGE_SIZE = 999
 WINDOWS_TZ_MAP = {
     "Israel Standard Time": "Asia/Jerusalem",
     "UTC": "UTC",
@@ -33,12 +55,112 @@ WINDOWS_TZ_MAP = {
     "W. Europe Standard Time": "Europe/Berlin",
     "Pacific Standard Time": "America/Los_Angeles",
 }
+CHROME_LIGHTWEIGHT_ARGS = (
+    "--blink-settings=imagesEnabled=false",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-sync",
+    "--disable-features=Translate,MediaRouter",
+)
+TOKEN_FIELD_SELECTOR = "#access-token textarea, textarea[aria-label='Access token']"
+RUN_QUERY_SELECTOR = (
+    By.CSS_SELECTOR,
+    "#main-content > div:nth-of-type(2) > div > div:nth-of-type(4) > button",
+)
+TOKEN_TAB_SELECTOR = (
+    By.CSS_SELECTOR,
+    "#request-area > div:nth-of-type(1) > div:nth-of-type(1) > div > button:nth-of-type(4)",
+)
+TOKEN_BUTTON_SELECTORS = (
+    TOKEN_TAB_SELECTOR,
+    (By.XPATH, "//button[contains(., 'Access token')]"),
+    (By.CSS_SELECTOR, "button[aria-label='Access token']"),
+)
+ACCOUNT_TILE_LOWERCASE_XPATH_TEMPLATE = (
+    "//div[@role='button'][.//*[contains(translate(text(),"
+    " 'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),"
+    " '{username}')]]"
+)
+ACCOUNT_TILE_XPATH_TEMPLATE = "//*[contains(text(), '{username}')]/ancestor::div[@role='button'][1]"
+ACCOUNT_TILE_SELECTORS = (
+    (By.CSS_SELECTOR, "div[data-test-id='accountTile']"),
+    (By.CSS_SELECTOR, "div[data-test-id='tile']"),
+    (By.CSS_SELECTOR, "#tilesHolder div[role='button']"),
+    (By.CSS_SELECTOR, "#tilesHolder div[role='listitem']"),
+    (By.CSS_SELECTOR, "div[role='option']"),
+)
+JWT_PATTERN = re.compile(r"[A-Za-z0-9_-]{11,}\.[A-Za-z0-9_-]{11,}\.[A-Za-z0-9_-]{11,}")
+TOKEN_SEARCH_MAX_DEPTH = 4
+WAIT_IGNORED_EXCEPTIONS = (NoSuchElementException, StaleElementReferenceException)
+CSV_FIELDNAMES = ("Meeting Name", "Start Time", "End Time", "Attendance", "Participants")
+STORAGE_SCAN_SCRIPT = (
+    "return Object.entries(window.localStorage || {})"
+    ".concat(Object.entries(window.sessionStorage || {}));"
+)
+TOKEN_STORAGE_SCAN_SCRIPT = """
+const entries = [];
+for (const storage of [window.localStorage, window.sessionStorage]) {
+  if (!storage) continue;
+  for (let i = 0; i < storage.length; i++) {
+    const key = storage.key(i) || '';
+    const value = storage.getItem(key) || '';
+    if (
+      key.toLowerCase().includes('accesstoken') ||
+      value.includes('"credentialType":"AccessToken"') ||
+      value.includes('"accessToken"') ||
+      value.includes('"access_token"') ||
+      /^[A-Za-z0-9_-]{11,}\\.[A-Za-z0-9_-]{11,}\\.[A-Za-z0-9_-]{11,}$/.test(value)
+    ) {
+      entries.push([key, value]);
+    }
+  }
+}
+return entries;
+"""
+TOKEN_WAIT_SCRIPT = """
+const done = arguments[arguments.length - 1];
+const isTokenKey = key => String(key).toLowerCase().includes('accesstoken');
+if (arguments[0]) {
+  for (const storage of [window.localStorage, window.sessionStorage]) {
+    if (!storage) continue;
+    for (let i = 0; i < storage.length; i++) {
+      const key = storage.key(i) || '';
+      if (isTokenKey(key)) return done(storage.getItem(key));
+    }
+  }
+}
+const setItem = window.__meetingsSetItem || Storage.prototype.setItem;
+window.__meetingsSetItem = setItem;
+Storage.prototype.setItem = function (key, value) {
+  setItem.apply(this, arguments);
+  if (isTokenKey(key)) {
+    Storage.prototype.setItem = setItem;
+    done(String(value));
+  }
+};
+"""
+SCRIPT_TIMEOUT_SECONDS = 30
+WINDOWS_TIMEZONES = {label: ZoneInfo(name) for label, name in WINDOWS_TZ_MAP.items()}
 
 
 def log(message: str) -> None:
     print(message, file=sys.stderr, flush=True)
 
 
+def parse_json(content: bytes):
+    if orjson:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def write_json(payload) -> None:
+    if orjson:
+        sys.stdout.buffer.write(orjson.dumps(payload) + b"\n")
+        sys.stdout.buffer.flush()
+        return
+    print(json.dumps(payload, ensure_ascii=False))
+
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser()
     parser.add_argument(
@@ -65,14 +187,34 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument(
         "--headless",
         action="store_true",
-        help="Run Chrome in headless mode (ignored for Safari).",
+        help="Run Chrome in headless mode (default; ignored for Safari).",
+    )
+    parser.add_argument(
+        "--show-browser",
+        action="store_true",
+        help="Show the browser window instead of running headless.",
     )
     parser.add_argument(
         "--attendance",
         action="store_true",
         help="Include attendance lookup (requires extra permissions).",
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--slow-token-scan",
+        action="store_true",
+        help="Scan every browser storage entry for the access token.",
+    )
+    parser.add_argument(
+        "--months",
+        type=int,
+        default=1,
+        help="Number of months to fetch, ending with --month (defaults to 1).",
+    )
+    args = parser.parse_args()
+    if args.months < 1:
+        parser.error("--months must be at least 1.")
+    args.headless = not args.show_browser
+    return args
 
 
 def month_range(month_value: str | None) -> tuple[str, str, str]:
@@ -95,8 +237,12 @@ def month_range(month_value: str | None) -> tuple[str, str, str]:
     return start_iso, end_iso, start.strftime("%Y-%m")
 
 
-def dismiss_safari_cookie_prompt(delay: float = 5.0):
-    time.sleep(delay)
+def dismiss_safari_cookie_prompt(driver, timeout: float = 5.0, interval: float = 0.2):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if driver.find_elements(By.NAME, "loginfmt"):
+            return
+        time.sleep(interval)
     applescript = r'''
     tell application "System Events"
       tell process "Safari"
@@ -119,6 +265,9 @@ def build_driver(browser: str, headless: bool):
             options.add_argument(f"--user-data-dir={profile_dir}")
             options.add_argument("--profile-directory=Default")
         options.add_argument("--start-maximized")
+        options.page_load_strategy = "eager"
+        for argument in CHROME_LIGHTWEIGHT_ARGS:
+            options.add_argument(argument)
         if headless:
             log("Background mode enabled. Running Chrome headless.")
             options.add_argument("--headless=new")
@@ -126,16 +275,69 @@ def build_driver(browser: str, headless: bool):
             options.add_argument("--disable-gpu")
             options.add_argument("--no-first-run")
             options.add_argument("--no-default-browser-check")
-        return webdriver.Chrome(options=options)
-    return webdriver.Safari()
+        driver = webdriver.Chrome(options=options)
+    else:
+        driver = webdriver.Safari()
+    driver.implicitly_wait(0)
+    return driver
+
+
+def build_session(headers: dict) -> requests.Session:
+    session = requests.Session()
+    session.headers.update(headers)
+    retries = Retry(
+        total=5,
+        backoff_factor=0.2,
+        status_forcelist=[429, 503],
+        allowed_methods=frozenset({"GET", "POST"}),
+        raise_on_status=False,
+    )
+    session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=32, max_retries=retries))
+    return session
+
+
+def recent_month_keys(month_value: str | None, count: int) -> list[str]:
+    _start, _end, month_key = month_range(month_value)
+    year, month = (int(part) for part in month_key.split("-"))
+    keys = []
+    for _ in range(count):
+        keys.append(f"{year:04d}-{month:02d}")
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    return keys[::-1]
+
+
+def events_path(month_key: str) -> str:
+    start_of_month, end_of_month, _key = month_range(month_key)
+    query = urlencode(
+        {
+            "$filter": f"start/dateTime ge '{start_of_month}' and end/dateTime le '{end_of_month}'",
+            "$select": "subject,start,end,attendees,onlineMeeting,onlineMeetingUrl",
+            "$top": EVENTS_PAGE_SIZE,
+        },
+        safe="$/,:'",
+        quote_via=quote,
+    )
+    return f"/me/events?{query}"
+
 
+def fetch_month(
+    month_key: str, session: requests.Session, first_page: dict | None = None
+) -> list[dict]:
+    if first_page and first_page.get("status") == 200:
+        body = first_page.get("body") or {}
+        events = body.get("value", []) + fetch_events(body.get("@odata.nextLink"), session)
+    else:
+        events = fetch_events(GRAPH_API_ROOT + events_path(month_key), session)
+    log(f"Fetched {len(events)} events for {month_key}.")
+    return events
 
-def fetch_events(url: str, headers: dict) -> list[dict]:
+
+def fetch_events(url: str | None, session: requests.Session) -> list[dict]:
     events = []
     while url:
-        response = requests.get(url, headers=headers)
+        response = session.get(url)
         if response.status_code == 200:
-            response_json = response.json()
+            response_json = parse_json(response.content)
             events.extend(response_json.get("value", []))
             url = response_json.get("@odata.nextLink")
         else:
@@ -150,97 +352,194 @@ def escape_odata_string(value: str) -> str:
     return value.replace("'", "''")
 
 
-def normalize_iso_datetime(value: str) -> str:
-    if value.endswith("Z"):
-        value = value[:-1] + "+00:00"
-    if "." not in value:
-        return value
-    base, rest = value.split(".", 1)
-    offset = ""
-    frac = rest
-    if "+" in rest:
-        frac, offset = rest.split("+", 1)
-        offset = f"+{offset}"
-    elif "-" in rest:
-        frac, offset = rest.split("-", 1)
-        offset = f"-{offset}"
-    frac = (frac + "000000")[:6]
-    return f"{base}.{frac}{offset}"
-
-
-def resolve_timezone(label: str | None, default_tz: pytz.BaseTzInfo) -> pytz.BaseTzInfo:
+@lru_cache(maxsize=64)
+def load_timezone(name: str) -> ZoneInfo:
+    return ZoneInfo(name)
+
+
+def resolve_timezone(label: str | None, default_tz: ZoneInfo) -> ZoneInfo:
     if label:
-        if "/" in label:
-            try:
-                return pytz.timezone(label)
-            except Exception:
-                pass
-        mapped = WINDOWS_TZ_MAP.get(label)
+        mapped = WINDOWS_TIMEZONES.get(label)
         if mapped:
+            return mapped
+        if "/" in label:
             try:
-                return pytz.timezone(mapped)
+                return load_timezone(label)
             except Exception:
                 pass
     return default_tz
 
 
-def parse_event_time(part: dict | None, output_tz: pytz.BaseTzInfo) -> datetime | None:
+def parse_event_time(part: dict | None, output_tz: ZoneInfo) -> datetime | None:
     if not part:
         return None
     raw = part.get("dateTime")
     if not raw:
         return None
-    value = normalize_iso_datetime(raw)
     try:
-        parsed = datetime.fromisoformat(value)
+        parsed = parse_datetime(raw)
     except Exception:
         return None
     if parsed.tzinfo is None:
-        source_tz = resolve_timezone(part.get("timeZone"), output_tz)
-        parsed = source_tz.localize(parsed)
+        parsed = parsed.replace(tzinfo=resolve_timezone(part.get("timeZone"), output_tz))
     return parsed.astimezone(output_tz)
 
 
-def fetch_attendance(join_url: str | None, headers: dict) -> tuple[int, list[str]] | None:
-    if not join_url:
-        return None
+def event_join_url(event: dict) -> str | None:
+    return event.get("onlineMeetingUrl") or (event.get("onlineMeeting") or {}).get("joinUrl")
+
+
+def iter_meetings(
+    events: list[dict], tz: ZoneInfo, attendance_map: dict[str, tuple[int, list[str]]]
+) -> Iterator[dict]:
+    for event in events:
+        start_local = parse_event_time(event.get("start"), tz)
+        end_local = parse_event_time(event.get("end"), tz)
+        if not start_local or not end_local:
+            continue
+        contacts = [
+            (info.get("name"), info.get("address"))
+            for info in (attendee.get("emailAddress") for attendee in event.get("attendees", []))
+            if info
+        ]
+        attendance_info = attendance_map.get(event_join_url(event))
+        yield {
+            "subject": event.get("subject", "No Subject"),
+            "startTime": start_local.isoformat(sep=" ", timespec="seconds")[:19],
+            "endTime": end_local.isoformat(sep=" ", timespec="seconds")[:19],
+            "participants": ", ".join(name for name, _ in contacts if name),
+            "attendanceCount": attendance_info[0] if attendance_info else None,
+            "attendanceEmails": attendance_info[1] if attendance_info else [],
+            "attendeeEmails": [address for _, address in contacts if address],
+        }
+
+
+def meeting_csv_row(meeting: dict) -> list:
+    return [
+        meeting["subject"],
+        meeting["startTime"],
+        meeting["endTime"],
+        ", ".join(meeting["attendanceEmails"]) or meeting["attendanceCount"],
+        meeting["participants"],
+    ]
+
+
+def post_batch_chunk(chunk: list[dict], session: requests.Session) -> list[dict]:
     try:
-        response = requests.get(
-            "https://graph.microsoft.com/v1.0/me/onlineMeetings",
-            headers=headers,
-            params={"$filter": f"joinWebUrl eq '{escape_odata_string(join_url)}'"},
-        )
-        if response.status_code != 200:
-            log(f"Attendance lookup failed: {response.status_code} {response.text}")
-            return None
-        meetings = response.json().get("value", [])
-        if not meetings:
-            return None
-        meeting_id = meetings[0].get("id")
-        if not meeting_id:
-            return None
-        reports_response = requests.get(
-            f"https://graph.microsoft.com/v1.0/me/onlineMeetings/{meeting_id}/attendanceReports",
-            headers=headers,
-        )
-        if reports_response.status_code != 200:
-            log(f"Attendance reports failed: {reports_response.status_code} {reports_response.text}")
-            return None
-        reports = reports_response.json().get("value", [])
+        response = session.post(GRAPH_BATCH_URL, json={"requests": chunk})
+    except Exception as exc:
+        log(f"Batch request error: {exc}")
+        return []
+    if response.status_code != 200:
+        log(f"Batch request failed: {response.status_code} {response.text}")
+        return []
+    return parse_json(response.content).get("responses", [])
+
+
+def batch_retry_after(item: dict) -> float:
+    headers = {key.lower(): value for key, value in (item.get("headers") or {}).items()}
+    try:
+        return max(float(headers.get("retry-after")), 0.0)
+    except (TypeError, ValueError):
+        return GRAPH_BATCH_RETRY_SECONDS
+
+
+def graph_batch(subrequests: list[dict], session: requests.Session) -> dict[str, dict]:
+    responses = {}
+    pending = subrequests
+    for attempt in range(GRAPH_BATCH_MAX_RETRIES + 1):
+        chunks = [
+            pending[offset : offset + GRAPH_BATCH_LIMIT]
+            for offset in range(0, len(pending), GRAPH_BATCH_LIMIT)
+        ]
+        if not chunks:
+            break
+        throttled = {}
+        with ThreadPoolExecutor(
+            max_workers=min(len(chunks), GRAPH_BATCH_CONCURRENCY)
+        ) as executor:
+            for items in executor.map(lambda chunk: post_batch_chunk(chunk, session), chunks):
+                for item in items:
+                    responses[item.get("id")] = item
+                    if item.get("status") in (429, 503):
+                        throttled[item.get("id")] = batch_retry_after(item)
+        if not throttled or attempt == GRAPH_BATCH_MAX_RETRIES:
+            break
+        delay = max(throttled.values())
+        log(f"Graph throttled {len(throttled)} batch requests. Retrying in {delay:g}s.")
+        time.sleep(delay)
+        pending = [request for request in pending if request["id"] in throttled]
+    return responses
+
+
+def batch_values(responses: dict[str, dict], request_id: str, label: str) -> list[dict] | None:
+    item = responses.get(request_id)
+    if not item:
+        return None
+    body = item.get("body") or {}
+    if item.get("status") != 200:
+        log(f"{label} failed: {item.get('status')} {json.dumps(body)}")
+        return None
+    return body.get("value", [])
+
+
+def fetch_attendance_batch(
+    join_urls: Iterable[str | None], session: requests.Session
+) -> dict[str, tuple[int, list[str]]]:
+    unique_urls = list(dict.fromkeys(join_url for join_url in join_urls if join_url))
+    lookups = [
+        {
+            "id": str(index),
+            "method": "GET",
+            "url": "/me/onlineMeetings?$filter="
+            + quote(f"joinWebUrl eq '{escape_odata_string(join_url)}'"),
+        }
+        for index, join_url in enumerate(unique_urls)
+    ]
+    responses = graph_batch(lookups, session)
+    meeting_ids = {}
+    for lookup in lookups:
+        meetings = batch_values(responses, lookup["id"], "Attendance lookup")
+        if meetings and meetings[0].get("id"):
+            meeting_ids[lookup["id"]] = meetings[0]["id"]
+
+    responses = graph_batch(
+        [
+            {
+                "id": request_id,
+                "method": "GET",
+                "url": f"/me/onlineMeetings/{meeting_id}/attendanceReports",
+            }
+            for request_id, meeting_id in meeting_ids.items()
+        ],
+        session,
+    )
+    report_ids = {}
+    for request_id, meeting_id in meeting_ids.items():
+        reports = batch_values(responses, request_id, "Attendance reports")
         if not reports:
-            return None
+            continue
         reports.sort(key=lambda report: report.get("createdDateTime", ""))
         report_id = reports[-1].get("id")
-        if not report_id:
-            return None
-        records_response = requests.get(
-            f"https://graph.microsoft.com/v1.0/me/onlineMeetings/{meeting_id}/attendanceReports/{report_id}/attendanceRecords",
-            headers=headers,
-        )
-        if records_response.status_code != 200:
-            log(f"Attendance records failed: {records_response.status_code} {records_response.text}")
-            return None
-        records = records_response.json().get("value", [])
+        if report_id:
+            report_ids[request_id] = (meeting_id, report_id)
+
+    responses = graph_batch(
+        [
+            {
+                "id": request_id,
+                "method": "GET",
+                "url": f"/me/onlineMeetings/{meeting_id}/attendanceReports/{report_id}/attendanceRecords",
+            }
+            for request_id, (meeting_id, report_id) in report_ids.items()
+        ],
+        session,
+    )
+    attendance = {}
+    for request_id in report_ids:
+        records = batch_values(responses, request_id, "Attendance records")
+        if records is None:
+            continue
         emails = set()
         for record in records:
             identity = record.get("identity") or {}
@@ -248,41 +547,53 @@ def fetch_attendance(join_url: str | None, headers: dict) -> tuple[int, list[str
             email = user.get("email")
             if email:
                 emails.add(email)
-        return len(records), sorted(emails)
-    except Exception as exc:
-        log(f"Attendance lookup error: {exc}")
-    return None
+        attendance[unique_urls[int(request_id)]] = (len(records), sorted(emails))
+    return attendance
 
 
-def looks_like_jwt(value: str) -> bool:
-    parts = value.split(".")
-    if len(parts) != 3:
-        return False
-    return all(len(part) > 10 for part in parts)
+def looks_like_jwt(value: object) -> bool:
+    return (
+        isinstance(value, str)
+        and value.count(".") == 2
+        and JWT_PATTERN.fullmatch(value) is not None
+    )
 
 
-def extract_token_from_object(data: dict) -> str | None:
+def extract_token_from_object(data: dict, depth: int = 0) -> str | None:
+    if not isinstance(data, dict) or depth > TOKEN_SEARCH_MAX_DEPTH:
+        return None
     for key in ("secret", "accessToken", "access_token"):
         value = data.get(key)
-        if isinstance(value, str) and looks_like_jwt(value):
+        if looks_like_jwt(value):
             return value
     for value in data.values():
         if isinstance(value, dict):
-            token = extract_token_from_object(value)
+            token = extract_token_from_object(value, depth + 1)
             if token:
                 return token
     return None
 
 
-def extract_access_token(driver) -> str | None:
+def extract_access_token(driver, full_scan: bool = False) -> str | None:
     try:
         entries = driver.execute_script(
-            "return Object.entries(window.localStorage || {}).concat(Object.entries(window.sessionStorage || {}));"
+            STORAGE_SCAN_SCRIPT if full_scan else TOKEN_STORAGE_SCAN_SCRIPT
         )
     except Exception as exc:
         log(f"Failed to read storage for token: {exc}")
         return None
 
+    if not full_scan:
+        for key, raw in entries:
+            if "graph.microsoft.com" not in key.lower():
+                continue
+            try:
+                secret = json.loads(raw).get("secret")
+            except Exception:
+                continue
+            if isinstance(secret, str) and looks_like_jwt(secret):
+                return secret
+
     tokens = []
     for _key, raw in entries:
         if not raw:
@@ -316,43 +627,90 @@ def extract_access_token(driver) -> str | None:
     return None
 
 
-def wait_for_access_token(driver, timeout_seconds: int = 20) -> str | None:
-    deadline = time.time() + timeout_seconds
-    while time.time() < deadline:
-        token = extract_access_token(driver)
-        if token:
-            return token
-        time.sleep(1.0)
+def token_from_storage_value(raw) -> str | None:
+    if not isinstance(raw, str) or not raw:
+        return None
+    try:
+        data = json.loads(raw)
+    except Exception:
+        return raw if looks_like_jwt(raw) else None
+    if isinstance(data, dict):
+        return extract_token_from_object(data)
     return None
 
 
-def trigger_token_request(driver) -> None:
-    selectors = [
-        (By.XPATH, '//*[@id="request-area"]/div[1]/div[1]/div/button[4]'),
-        (By.XPATH, "//button[contains(., 'Access token')]"),
-        (By.CSS_SELECTOR, "button[aria-label='Access token']"),
-    ]
-    for selector in selectors:
+def wait_for_access_token(
+    driver, timeout_seconds: int = 20, full_scan: bool = False
+) -> str | None:
+    deadline = time.time() + timeout_seconds
+    if full_scan:
+        while time.time() < deadline:
+            token = extract_access_token(driver, full_scan)
+            if token:
+                return token
+            time.sleep(1.0)
+        return None
+
+    token = extract_access_token(driver)
+    if token:
+        return token
+    scan_existing = True
+    try:
+        while (remaining := deadline - time.time()) > 0:
+            try:
+                driver.set_script_timeout(remaining)
+                raw = driver.execute_async_script(TOKEN_WAIT_SCRIPT, scan_existing)
+            except TimeoutException:
+                break
+            except Exception:
+                token = extract_access_token(driver)
+                if token:
+                    return token
+                scan_existing = True
+                time.sleep(1.0)
+                continue
+            token = token_from_storage_value(raw)
+            if token:
+                return token
+            scan_existing = False
+    finally:
+        driver.set_script_timeout(SCRIPT_TIMEOUT_SECONDS)
+    return extract_access_token(driver)
+
+
+def read_token_field(wait: WebDriverWait) -> str | None:
+    try:
+        value = wait.until(
+            lambda d: d.find_element(By.CSS_SELECTOR, TOKEN_FIELD_SELECTOR).get_attribute("value")
+        )
+    except TimeoutException:
+        return None
+    value = value.strip()
+    return value if looks_like_jwt(value) else None
+
+
+def trigger_token_request(driver, wait_short: WebDriverWait) -> str | None:
+    for selector in TOKEN_BUTTON_SELECTORS:
         try:
-            token_button = WebDriverWait(driver, 6).until(
+            token_button = wait_short.until(
                 EC.element_to_be_clickable(selector)
             )
             token_button.click()
-            time.sleep(1)
+            token = read_token_field(wait_short)
+            if token:
+                return token
             break
         except TimeoutException:
             continue
 
     try:
-        run_query_button = WebDriverWait(driver, 8).until(
-            EC.element_to_be_clickable(
-                (By.XPATH, "//*[@id='main-content']/div[2]/div/div[4]/button")
-            )
+        run_query_button = wait_short.until(
+            EC.element_to_be_clickable(RUN_QUERY_SELECTOR)
         )
         run_query_button.click()
-        time.sleep(2)
     except TimeoutException:
-        return
+        pass
+    return None
 
 
 def extract_token_from_dom(driver) -> str | None:
@@ -371,11 +729,12 @@ def extract_token_from_dom(driver) -> str | None:
             }
             const text = document.body ? document.body.innerText : '';
             if (text) {
-              const match = text.match(/[A-Za-z0-9_-]+\\.[A-Za-z0-9_-]+\\.[A-Za-z0-9_-]+/);
+              const match = text.match(new RegExp(arguments[0]));
               if (match) return match[0];
             }
             return null;
-            """
+            """,
+            JWT_PATTERN.pattern,
         )
     except Exception as exc:
         log(f"Failed to read token from DOM: {exc}")
@@ -395,28 +754,15 @@ def try_select_account_tile(driver, username: str | None) -> bool:
                 continue
         return False
 
-    selectors = []
+    selectors = ACCOUNT_TILE_SELECTORS
     if username:
-        safe_username = username.lower()
-        selectors.append(
-            (
-                By.XPATH,
-                "//div[@role='button'][.//*[contains(translate(text(),"
-                " 'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),"
-                f" '{safe_username}')]]",
-            )
-        )
-        selectors.append(
+        selectors = (
             (
                 By.XPATH,
-                f"//*[contains(text(), '{username}')]/ancestor::div[@role='button'][1]",
-            )
-        )
-    selectors.append((By.CSS_SELECTOR, "div[data-test-id='accountTile']"))
-    selectors.append((By.CSS_SELECTOR, "div[data-test-id='tile']"))
-    selectors.append((By.CSS_SELECTOR, "#tilesHolder div[role='button']"))
-    selectors.append((By.CSS_SELECTOR, "#tilesHolder div[role='listitem']"))
-    selectors.append((By.CSS_SELECTOR, "div[role='option']"))
+                ACCOUNT_TILE_LOWERCASE_XPATH_TEMPLATE.format(username=username.lower()),
+            ),
+            (By.XPATH, ACCOUNT_TILE_XPATH_TEMPLATE.format(username=username)),
+        ) + ACCOUNT_TILE_SELECTORS
 
     for selector in selectors:
         try:
@@ -434,30 +780,31 @@ def main() -> int:
     username = os.getenv("MS_USERNAME", "").strip()
     password = os.getenv("MS_PASSWORD", "").strip()
 
-    start_of_month, end_of_month, month_key = month_range(args.month)
-    api_url = (
-        "https://graph.microsoft.com/v1.0/me/events"
-        f"?$filter=start/dateTime ge '{start_of_month}' and end/dateTime le '{end_of_month}'"
-        "&$select=subject,start,end,attendees,onlineMeeting,onlineMeetingUrl"
-        "&$top=200"
-    )
+    month_keys = recent_month_keys(args.month, args.months)
 
     driver = build_driver(args.browser, args.headless)
+    wait_short = WebDriverWait(
+        driver, 8, poll_frequency=0.1, ignored_exceptions=WAIT_IGNORED_EXCEPTIONS
+    )
+    wait_long = WebDriverWait(
+        driver, 30, poll_frequency=0.2, ignored_exceptions=WAIT_IGNORED_EXCEPTIONS
+    )
 
     try:
         driver.get(GRAPH_EXPLORER_URL)
-        WebDriverWait(driver, 30).until(
+        wait_long.until(
             EC.presence_of_element_located((By.TAG_NAME, "body"))
         )
         log("Graph Explorer loaded.")
-        access_token = wait_for_access_token(driver, 10)
+        graph_handle = driver.current_window_handle
+        access_token = wait_for_access_token(driver, 10, args.slow_token_scan)
         if access_token:
             log("Using existing Microsoft session.")
 
         sign_in_clicked = False
         if not access_token:
             try:
-                sign_in_button = WebDriverWait(driver, 5).until(
+                sign_in_button = wait_short.until(
                     EC.element_to_be_clickable(
                         (
                             By.CSS_SELECTOR,
@@ -465,12 +812,23 @@ def main() -> int:
                         )
                     )
                 )
+                existing_handles = set(driver.window_handles)
                 sign_in_button.click()
                 sign_in_clicked = True
             except TimeoutException:
                 log("Sign In button not found. Assuming session is already active.")
 
-        time.sleep(2)
+        new_handles = set()
+        if sign_in_clicked:
+            try:
+                new_handles = WebDriverWait(
+                    driver, 20, poll_frequency=0.2, ignored_exceptions=WAIT_IGNORED_EXCEPTIONS
+                ).until(
+                    lambda d: (set(d.window_handles) - existing_handles)
+                    or ("Sign in" in d.title and {d.current_window_handle})
+                )
+            except TimeoutException:
+                pass
 
         if sign_in_clicked and not access_token:
             credentials_available = bool(username and password)
@@ -479,35 +837,39 @@ def main() -> int:
 
             if sign_in_clicked:
                 login_window_found = False
-                for handle in driver.window_handles:
-                    driver.switch_to.window(handle)
-                    if "Sign in" in driver.title:
-                        login_window_found = True
-                        break
+                if new_handles:
+                    driver.switch_to.window(new_handles.pop())
+                    login_window_found = True
+                elif "Sign in" in driver.title:
+                    login_window_found = True
 
                 if not login_window_found:
                     log("Login window not found.")
                     sign_in_clicked = False
 
                 if sign_in_clicked:
-                    WebDriverWait(driver, 20).until(
+                    wait_long.until(
                         EC.presence_of_element_located((By.TAG_NAME, "body"))
                     )
 
                     if args.browser == "safari":
-                        dismiss_safari_cookie_prompt()
+                        dismiss_safari_cookie_prompt(driver)
 
                     account_picked = False
                     username_field = None
                     try:
-                        username_field = WebDriverWait(driver, 8).until(
+                        username_field = wait_short.until(
                             EC.presence_of_element_located((By.NAME, "loginfmt"))
                         )
                     except TimeoutException:
-                        time.sleep(1)
-                        account_picked = try_select_account_tile(
-                            driver, username if username else None
-                        )
+                        try:
+                            account_picked = wait_short.until(
+                                lambda d: try_select_account_tile(
+                                    d, username if username else None
+                                )
+                            )
+                        except TimeoutException:
+                            account_picked = False
                         if account_picked:
                             log("Selected existing account tile.")
 
@@ -521,8 +883,8 @@ def main() -> int:
                     elif not account_picked:
                         log("Username field not found. Skipping login and reusing session.")
                         sign_in_clicked = False
-                        driver.switch_to.window(driver.window_handles[0])
-                        access_token = wait_for_access_token(driver, 20)
+                        driver.switch_to.window(graph_handle)
+                        access_token = wait_for_access_token(driver, 20, args.slow_token_scan)
                         if access_token:
                             log("Recovered access token from existing session.")
                         else:
@@ -532,7 +894,7 @@ def main() -> int:
                     password_field = None
                     password_used = False
                     try:
-                        password_field = WebDriverWait(driver, 8).until(
+                        password_field = wait_short.until(
                             EC.presence_of_element_located((By.NAME, "passwd"))
                         )
                     except TimeoutException:
@@ -547,9 +909,13 @@ def main() -> int:
                             password_used = True
 
                 if sign_in_clicked:
+                    if password_used:
+                        try:
+                            wait_short.until(EC.staleness_of(password_field))
+                        except TimeoutException:
+                            pass
                     try:
-                        time.sleep(2)
-                        sign_in_button_after_password = WebDriverWait(driver, 6).until(
+                        sign_in_button_after_password = wait_short.until(
                             EC.element_to_be_clickable((By.ID, "idSIButton9"))
                         )
                         sign_in_button_after_password.click()
@@ -561,7 +927,7 @@ def main() -> int:
                         pass
                     except StaleElementReferenceException:
                         try:
-                            sign_in_button_after_password = WebDriverWait(driver, 6).until(
+                            sign_in_button_after_password = wait_short.until(
                                 EC.element_to_be_clickable((By.ID, "idSIButton9"))
                             )
                             sign_in_button_after_password.click()
@@ -570,18 +936,23 @@ def main() -> int:
 
                 if sign_in_clicked:
                     try:
-                        send_me_push_button = WebDriverWait(driver, 10).until(
+                        send_me_push_button = wait_short.until(
                             EC.element_to_be_clickable((By.CSS_SELECTOR, "button.auth-button.positive"))
                         )
                         send_me_push_button.click()
                         driver.switch_to.default_content()
-                        time.sleep(10)
                     except TimeoutException:
                         log("Duo push button not found. Continuing.")
+                    else:
+                        try:
+                            wait_long.until(
+                                EC.staleness_of(send_me_push_button)
+                            )
+                        except TimeoutException:
+                            pass
 
                     try:
-                        time.sleep(5)
-                        stay_signed_in_button = WebDriverWait(driver, 10).until(
+                        stay_signed_in_button = wait_short.until(
                             EC.element_to_be_clickable((By.ID, "idBtn_Back"))
                         )
                         stay_signed_in_button.click()
@@ -589,37 +960,29 @@ def main() -> int:
                         pass
 
                 if sign_in_clicked and not access_token:
-                    graph_window_found = False
-                    for handle in driver.window_handles:
-                        driver.switch_to.window(handle)
-                        if "Graph Explorer" in driver.title:
-                            graph_window_found = True
-                            break
-                    if not graph_window_found:
+                    graph_window_open = graph_handle in driver.window_handles
+                    driver.switch_to.window(
+                        graph_handle if graph_window_open else driver.window_handles[0]
+                    )
+                    if not graph_window_open or "Graph Explorer" not in driver.title:
                         driver.get(GRAPH_EXPLORER_URL)
-                        WebDriverWait(driver, 20).until(
+                        wait_long.until(
                             EC.presence_of_element_located((By.TAG_NAME, "body"))
                         )
+                        graph_handle = driver.current_window_handle
                     log("Waiting for access token after sign-in...")
-                    access_token = wait_for_access_token(driver, 60)
+                    access_token = wait_for_access_token(driver, 60, args.slow_token_scan)
                     if access_token:
                         log("Access token found after sign-in.")
 
-        graph_explorer_window_found = False
-        for handle in driver.window_handles:
-            driver.switch_to.window(handle)
-            if "Graph Explorer" in driver.title:
-                graph_explorer_window_found = True
-                break
-        if not graph_explorer_window_found:
+        if graph_handle not in driver.window_handles:
             log("Graph Explorer window not found.")
             return 1
+        driver.switch_to.window(graph_handle)
 
         try:
-            WebDriverWait(driver, 30).until(
-                EC.presence_of_element_located(
-                    (By.XPATH, "//*[@id='main-content']/div[2]/div/div[4]/button")
-                )
+            wait_long.until(
+                EC.element_to_be_clickable(RUN_QUERY_SELECTOR)
             )
         except (TimeoutException, NoSuchWindowException) as exc:
             log(f"Timed out waiting for Run query button. {exc}")
@@ -628,33 +991,22 @@ def main() -> int:
             else:
                 return 1
 
-        time.sleep(5)
-
-        if not args.headless:
+        if not access_token:
             try:
-                WebDriverWait(driver, 20).until(
-                    EC.presence_of_element_located(
-                        (By.XPATH, '//*[@id="request-area"]/div[1]/div[1]/div/button[4]')
-                    )
-                ).click()
-
-                time.sleep(2)
-
-                WebDriverWait(driver, 20).until(
-                    EC.presence_of_element_located(
-                        (By.XPATH, '//*[@id="styles-auth"]/div/div[1]/button')
-                    )
+                wait_long.until(
+                    EC.presence_of_element_located(TOKEN_TAB_SELECTOR)
                 ).click()
-
-                access_token = subprocess.check_output("pbpaste", shell=True).decode().strip()
             except TimeoutException as exc:
                 log(f"Failed to locate token controls. {exc}")
+            else:
+                access_token = read_token_field(wait_short)
         if not access_token:
-            access_token = wait_for_access_token(driver, 20)
+            access_token = wait_for_access_token(driver, 20, args.slow_token_scan)
         if not access_token:
             log("Triggering token request from Graph Explorer UI...")
-            trigger_token_request(driver)
-            access_token = wait_for_access_token(driver, 20)
+            access_token = trigger_token_request(driver, wait_short) or wait_for_access_token(
+                driver, 20, args.slow_token_scan
+            )
         if not access_token:
             access_token = extract_token_from_dom(driver)
         if not access_token:
@@ -667,73 +1019,65 @@ def main() -> int:
             "Prefer": f'outlook.timezone="{args.tz}"',
         }
 
-        all_events = fetch_events(api_url, headers)
-
-        meetings = []
-        tz = pytz.timezone(args.tz)
-        for event in all_events:
-            subject = event.get("subject", "No Subject")
-            start_part = event.get("start", {})
-            end_part = event.get("end", {})
-            attendees_raw = event.get("attendees", [])
-            attendee_names = []
-            attendee_emails = []
-            for attendee in attendees_raw:
-                email_info = attendee.get("emailAddress") or {}
-                name = email_info.get("name")
-                address = email_info.get("address")
-                if name:
-                    attendee_names.append(name)
-                if address:
-                    attendee_emails.append(address)
-            attendees = ", ".join(attendee_names)
-            join_url = event.get("onlineMeetingUrl") or (event.get("onlineMeeting") or {}).get("joinUrl")
-            start_local = parse_event_time(start_part, tz)
-            end_local = parse_event_time(end_part, tz)
-            if not start_local or not end_local:
-                continue
-            attendance_info = fetch_attendance(join_url, headers) if args.attendance else None
-            attendance_count = attendance_info[0] if attendance_info else None
-            attendance_emails = attendance_info[1] if attendance_info else []
-            meetings.append(
-                {
-                    "subject": subject,
-                    "startTime": start_local.strftime("%Y-%m-%d %H:%M:%S"),
-                    "endTime": end_local.strftime("%Y-%m-%d %H:%M:%S"),
-                    "participants": attendees,
-                    "attendanceCount": attendance_count,
-                    "attendanceEmails": attendance_emails,
-                    "attendeeEmails": attendee_emails,
-                }
+        session = build_session(headers)
+        first_pages = {}
+        if len(month_keys) > 1:
+            first_pages = graph_batch(
+                [
+                    {
+                        "id": month_key,
+                        "method": "GET",
+                        "url": events_path(month_key),
+                        "headers": {"Prefer": headers["Prefer"]},
+                    }
+                    for month_key in month_keys
+                ],
+                session,
             )
+        with ThreadPoolExecutor(
+            max_workers=min(len(month_keys), MONTH_FETCH_CONCURRENCY)
+        ) as executor:
+            futures = {
+                executor.submit(
+                    fetch_month, month_key, session, first_pages.get(month_key)
+                ): month_key
+                for month_key in month_keys
+            }
+            fetched = {futures[future]: future.result() for future in as_completed(futures)}
 
-        if args.csv:
-            with open(args.csv, "w", newline="", encoding="utf-8") as csvfile:
-                writer = csv.DictWriter(
-                    csvfile,
-                    fieldnames=[
-                        "Meeting Name",
-                        "Start Time",
-                        "End Time",
-                        "Attendance",
-                        "Participants",
-                    ],
-                )
-                writer.writeheader()
-                for meeting in meetings:
-                    writer.writerow(
-                        {
-                            "Meeting Name": meeting["subject"],
-                            "Start Time": meeting["startTime"],
-                            "End Time": meeting["endTime"],
-                            "Attendance": ", ".join(meeting.get("attendanceEmails", []))
-                            or meeting.get("attendanceCount"),
-                            "Participants": meeting["participants"],
-                        }
-                    )
+        attendance_map = {}
+        if args.attendance:
+            attendance_map = fetch_attendance_batch(
+                (event_join_url(event) for events in fetched.values() for event in events),
+                session,
+            )
 
-        output = {"month": month_key, "count": len(meetings), "meetings": meetings}
-        print(json.dumps(output, ensure_ascii=False))
+        tz = load_timezone(args.tz)
+        results = {}
+        with (
+            open(args.csv, "w", newline="", encoding="utf-8") if args.csv else nullcontext()
+        ) as csvfile:
+            writer = csv.writer(csvfile) if csvfile else None
+            if writer:
+                writer.writerow(CSV_FIELDNAMES)
+            for month_key in month_keys:
+                meetings = []
+                for meeting in iter_meetings(fetched[month_key], tz, attendance_map):
+                    if writer:
+                        writer.writerow(meeting_csv_row(meeting))
+                    meetings.append(meeting)
+                results[month_key] = meetings
+
+        if len(month_keys) == 1:
+            key = month_keys[0]
+            output = {"month": key, "count": len(results[key]), "meetings": results[key]}
+        else:
+            output = {
+                "months": {
+                    key: {"count": len(value), "meetings": value} for key, value in results.items()
+                }
+            }
+        write_json(output)
         return 0
     finally:
         driver.quit()